@@ -1,7 +1,7 @@
 from google.adk.agents import Agent
 from .tools.file_system_tool import read_file_tool, write_file_tool
 from .tools.vector_search_tool import search_code_adk_tool, search_files_adk_tool, get_file_context_adk_tool
-from .tools.lsp_tool import get_diagnostics_adk_tool, go_to_definition_adk_tool, find_references_adk_tool, validate_code_adk_tool
+from .tools.lsp_tool import get_diagnostics_adk_tool, batch_diagnostics_adk_tool, go_to_definition_adk_tool, find_references_adk_tool, validate_code_adk_tool
 from .tools.indexing_tool import index_codebase_adk_tool
 
 # this is the main agent that ADK will discover
@@ -27,9 +27,10 @@ root_agent = Agent(
 
 ## Language Server Protocol (LSP) Integration
 - **Real-time Diagnostics**: Get errors, warnings, and hints for any code file
+- **Batch Diagnostics**: Check several files in one call instead of one call per file
 - **Go to Definition**: Find where symbols are defined across the codebase
 - **Find References**: Locate all usages of functions, classes, or variables
-- **Code Validation**: Validate code changes in a shadow workspace before applying them
+- **Code Validation**: Check proposed file contents for errors before writing them
 
 ## How to Use Your Tools Effectively
 
@@ -41,7 +42,7 @@ root_agent = Agent(
 
 ### When to Use LSP Tools
 - Before making changes: Check diagnostics to understand current issues
-- After making changes: Validate code in shadow workspace to ensure no errors
+- Before writing changes: Validate the proposed content to ensure no errors
 - For code navigation: Find definitions and references to understand relationships
 - When debugging: Use diagnostics to identify problems
 
@@ -58,7 +59,7 @@ root_agent = Agent(
    - Check diagnostics to see current state
 
 2. **When making changes**:
-   - Validate code in shadow workspace before applying
+   - Validate the proposed content before writing it
    - Use LSP tools to ensure no new errors are introduced
    - Consider impact on other parts of the codebase using reference finding
 
@@ -78,7 +79,7 @@ When helping users:
 1. **Understand the context** using semantic search and file exploration
 2. **Analyze the current state** using diagnostics and code reading
 3. **Plan changes carefully** considering the broader codebase
-4. **Validate changes** using shadow workspace before applying
+4. **Validate changes** with the code validation tool before writing them
 5. **Provide clear explanations** of what you're doing and why
 
 Be proactive in using your tools to provide comprehensive, well-informed assistance. Always prioritize code quality, maintainability, and security.""",
@@ -97,6 +98,7 @@ Be proactive in using your tools to provide comprehensive, well-informed assista
         
         # LSP integration for code analysis
         get_diagnostics_adk_tool,
+        batch_diagnostics_adk_tool,
         go_to_definition_adk_tool,
         find_references_adk_tool,
         validate_code_adk_tool
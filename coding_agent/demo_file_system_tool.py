@@ -45,5 +45,3 @@ def demo_file_operations():
 
 if __name__ == "__main__":
     demo_file_operations()
-
-print("hello world")
\ No newline at end of file
@@ -0,0 +1,88 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest import mock
+
+import numpy as np
+
+from coding_agent.tools import embed_cache
+from coding_agent.tools.embed_cache import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Unit tests for the persistent EmbeddingCache."""
+
+    def setUp(self):
+        """Create a cache backed by a throwaway SQLite file."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.temp_dir, "embed_cache.sqlite3")
+        self.cache = EmbeddingCache(self.cache_path, "test-model")
+        self.computed = []
+
+    def tearDown(self):
+        """Close the cache and remove its file."""
+        self.cache.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def compute(self, texts):
+        """Fake embedding function that records which texts it was asked for."""
+        self.computed.append(list(texts))
+        return np.array([[len(text), ord(text[0])] for text in texts], dtype=np.float32)
+
+    def test_miss_then_hit(self):
+        """Test that cached texts are not recomputed."""
+        first = self.cache.get_or_compute(["alpha", "beta"], self.compute)
+        second = self.cache.get_or_compute(["alpha", "beta", "gamma"], self.compute)
+
+        self.assertEqual(self.computed, [["alpha", "beta"], ["gamma"]])
+        np.testing.assert_array_equal(second[:2], first)
+        np.testing.assert_array_equal(second[2], [5, ord("g")])
+        self.assertEqual(second.dtype, np.float32)
+
+    def test_hits_survive_reopen(self):
+        """Test that embeddings persist across cache instances."""
+        self.cache.get_or_compute(["alpha"], self.compute)
+        self.cache.close()
+        self.cache = EmbeddingCache(self.cache_path, "test-model")
+
+        result = self.cache.get_or_compute(["alpha"], self.compute)
+        self.assertEqual(self.computed, [["alpha"]])
+        np.testing.assert_array_equal(result, [[5, ord("a")]])
+
+    def test_duplicate_texts_computed_once(self):
+        """Test that repeated texts are embedded once but returned once per input."""
+        result = self.cache.get_or_compute(["same", "other", "same"], self.compute)
+
+        self.assertEqual(self.computed, [["same", "other"]])
+        self.assertEqual(result.shape, (3, 2))
+        np.testing.assert_array_equal(result[0], result[2])
+
+    def test_other_model_does_not_hit(self):
+        """Test that entries are scoped to the model name."""
+        self.cache.get_or_compute(["alpha"], self.compute)
+        other = EmbeddingCache(self.cache_path, "other-model")
+        try:
+            other.get_or_compute(["alpha"], self.compute)
+        finally:
+            other.close()
+        self.assertEqual(self.computed, [["alpha"], ["alpha"]])
+
+    def test_expired_entries_are_recomputed(self):
+        """Test that entries older than the TTL are treated as misses."""
+        with mock.patch.object(embed_cache.time, "time", return_value=1000.0):
+            self.cache.get_or_compute(["alpha"], self.compute)
+        with mock.patch.object(embed_cache.time, "time", return_value=1000.0 + embed_cache.DEFAULT_TTL_SECONDS + 1):
+            self.cache.get_or_compute(["alpha"], self.compute)
+        self.assertEqual(self.computed, [["alpha"], ["alpha"]])
+
+    def test_empty_input(self):
+        """Test that an empty batch returns an empty array without computing anything."""
+        result = self.cache.get_or_compute([], self.compute)
+
+        self.assertEqual(self.computed, [])
+        self.assertEqual(len(result), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -33,7 +33,9 @@ class TestFileSystemTool(unittest.TestCase):
             "example_code.py",
             "sample_html.html",
             "requirements.txt",
-            "subfolder/file.txt"  # Even if it doesn't exist
+            "subfolder/file.txt",  # Even if it doesn't exist
+            "coding_agent/../example_code.py",  # ".." that stays inside the root
+            "...hidden/file.txt"
         ]
         
         for path in valid_paths:
@@ -46,7 +48,8 @@ class TestFileSystemTool(unittest.TestCase):
             "../outside_project.txt",
             "../../etc/passwd",
             "/etc/passwd",
-            "tests/../../../sensitive_file.txt"
+            "tests/../../../sensitive_file.txt",
+            f"../{os.path.basename(PROJECT_ROOT)}_evil/file.txt"  # sibling sharing the root's prefix
         ]
         
         for path in unsafe_paths:
@@ -64,6 +67,55 @@ class TestFileSystemTool(unittest.TestCase):
         self.assertIn("Error: File not found", result)
         self.assertIn("nonexistent_file.txt", result)
     
+    def test_read_file_large_file_is_windowed(self):
+        """Test that files larger than max_bytes are read one window at a time."""
+        first = read_file(self.test_file_path, max_bytes=10)
+        self.assertTrue(first.startswith(self.test_content[:10]))
+        self.assertIn("Truncated", first)
+        self.assertIn("offset=10", first)
+        
+        rest = read_file(self.test_file_path, offset=10, max_bytes=len(self.test_content))
+        self.assertEqual(rest, self.test_content[10:])
+    
+    def test_read_file_windows_keep_multibyte_characters(self):
+        """Test that paging through non-ASCII content with the suggested offsets loses nothing."""
+        content = "aé€😀" * 5
+        file_path = "coding_agent/tests/multibyte_test_file.txt"
+        with open(os.path.join(PROJECT_ROOT, file_path), 'w', encoding='utf-8') as f:
+            f.write(content)
+        try:
+            for max_bytes in (1, 2, 3, 5):
+                pieces = []
+                offset = 0
+                while True:
+                    result = read_file(file_path, offset=offset, max_bytes=max_bytes)
+                    piece, _, note = result.partition("\n\n[Truncated:")
+                    pieces.append(piece)
+                    if not note:
+                        break
+                    offset = int(note.rsplit("offset=", 1)[1].split(" ", 1)[0])
+                self.assertEqual("".join(pieces), content)
+        finally:
+            os.remove(os.path.join(PROJECT_ROOT, file_path))
+    
+    def test_read_file_offset_inside_character(self):
+        """Test that an offset inside a multi-byte character starts at the next character."""
+        content = "aé€b" * 3  # é is 2 bytes, € is 3
+        file_path = "coding_agent/tests/multibyte_offset_file.txt"
+        with open(os.path.join(PROJECT_ROOT, file_path), 'w', encoding='utf-8') as f:
+            f.write(content)
+        try:
+            # offset 2 is the second byte of "é", offsets 4 and 5 are inside "€"
+            for offset, start, expected in ((2, 3, "€"), (4, 6, "ba"), (5, 6, "ba")):
+                result = read_file(file_path, offset=offset, max_bytes=4)
+                self.assertTrue(result.startswith(expected + "\n\n[Truncated:"), result)
+                self.assertIn(f"showing bytes {start}-", result)
+            
+            tail = read_file(file_path, offset=len(content.encode('utf-8')) - 5)
+            self.assertTrue(tail.startswith("€b\n\n[Showing bytes"), tail)
+        finally:
+            os.remove(os.path.join(PROJECT_ROOT, file_path))
+    
     def test_read_file_unsafe_path(self):
         """Test reading a file outside the project directory."""
         result = read_file("../outside_project.txt")
@@ -127,6 +179,53 @@ class TestFileSystemTool(unittest.TestCase):
             written_content = f.read()
         self.assertEqual(written_content, new_content)
 
+    
+    def test_write_file_through_symlink_keeps_link(self):
+        """Test that writing to a symlink updates its target and leaves the link in place."""
+        link_path = "coding_agent/tests/temp_test_link.txt"
+        full_link_path = os.path.join(PROJECT_ROOT, link_path)
+        os.symlink(os.path.basename(self.full_test_path), full_link_path)
+        try:
+            result = write_file(link_path, "Written through the link.")
+            self.assertIn("Successfully wrote to", result)
+            self.assertTrue(os.path.islink(full_link_path))
+            with open(self.full_test_path, 'r') as f:
+                self.assertEqual(f.read(), "Written through the link.")
+        finally:
+            os.remove(full_link_path)
+    
+    def test_write_file_keeps_hard_links_shared(self):
+        """Test that rewriting a hard-linked file updates every name for it."""
+        link_path = "coding_agent/tests/temp_test_hardlink.txt"
+        full_link_path = os.path.join(PROJECT_ROOT, link_path)
+        os.link(self.full_test_path, full_link_path)
+        try:
+            write_file(link_path, "Shared content.")
+            with open(self.full_test_path, 'r') as f:
+                self.assertEqual(f.read(), "Shared content.")
+            self.assertTrue(os.path.samefile(self.full_test_path, full_link_path))
+        finally:
+            os.remove(full_link_path)
+    
+    def test_write_file_identical_content_is_skipped(self):
+        """Test that rewriting identical content is a no-op until the file changes on disk."""
+        new_content = "Content written twice."
+        
+        write_file(self.test_file_path, new_content)
+        result = write_file(self.test_file_path, new_content)
+        self.assertIn("Successfully wrote to", result)
+        self.assertIn("unchanged", result)
+        
+        # an external edit invalidates the cached digest
+        with open(self.full_test_path, 'w') as f:
+            f.write("Edited outside the tool.")
+        result = write_file(self.test_file_path, new_content)
+        self.assertNotIn("unchanged", result)
+        
+        with open(self.full_test_path, 'r') as f:
+            written_content = f.read()
+        self.assertEqual(written_content, new_content)
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,41 @@
+import unittest
+import os
+import tempfile
+import shutil
+
+from coding_agent.tools.lsp_tool import LSPTool
+
+
+class TestLSPToolBatchDiagnostics(unittest.TestCase):
+    """Unit tests for LSPTool.get_diagnostics_batch."""
+
+    def setUp(self):
+        """Create a throwaway project with one good, one undecodable file and a directory."""
+        self.project_root = tempfile.mkdtemp()
+        with open(os.path.join(self.project_root, "good.py"), 'w', encoding='utf-8') as f:
+            f.write("def add(a, b):\n    return a + b\n")
+        with open(os.path.join(self.project_root, "latin1.py"), 'wb') as f:
+            f.write("name = 'café'\n".encode('latin-1'))
+        os.makedirs(os.path.join(self.project_root, "pkg.py"))
+        self.lsp_tool = LSPTool(self.project_root)
+
+    def tearDown(self):
+        """Remove the throwaway project."""
+        self.lsp_tool.cleanup()
+        shutil.rmtree(self.project_root, ignore_errors=True)
+
+    def test_mixed_batch_isolates_failures(self):
+        """Test that missing and unreadable files get an error entry without failing the batch."""
+        file_paths = ["good.py", "missing.py", "latin1.py", "pkg.py"]
+        results = self.lsp_tool.get_diagnostics_batch(file_paths)
+
+        self.assertEqual(list(results), file_paths)
+        self.assertIn("Diagnostics for good.py", results["good.py"])
+        self.assertIn("Summary: 0 errors", results["good.py"])
+        self.assertEqual(results["missing.py"], "Error: File missing.py does not exist")
+        self.assertTrue(results["latin1.py"].startswith("Error: Could not read latin1.py"))
+        self.assertTrue(results["pkg.py"].startswith("Error: Could not read pkg.py"))
+
+
+if __name__ == '__main__':
+    unittest.main()
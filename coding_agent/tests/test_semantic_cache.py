@@ -0,0 +1,90 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from coding_agent.tools import semantic_cache
+from coding_agent.tools.semantic_cache import SemanticCache, get_semantic_cache, clear_semantic_caches
+
+
+class TestSemanticCache(unittest.TestCase):
+    """Unit tests for the similarity-matched SemanticCache."""
+
+    def test_hit_above_threshold(self):
+        """Test that a near-duplicate query returns the cached response."""
+        cache = SemanticCache(threshold=0.95)
+        cache.store([1.0, 0.0, 0.0], "answer")
+
+        # scaled and slightly rotated: cosine similarity ~0.995
+        self.assertEqual(cache.lookup([2.0, 0.2, 0.0]), "answer")
+
+    def test_miss_below_threshold(self):
+        """Test that a dissimilar query misses."""
+        cache = SemanticCache(threshold=0.95)
+        cache.store([1.0, 0.0, 0.0], "answer")
+
+        self.assertIsNone(cache.lookup([1.0, 1.0, 0.0]))
+        self.assertIsNone(cache.lookup([0.0, 1.0, 0.0]))
+
+    def test_best_match_wins(self):
+        """Test that the most similar cached query is returned."""
+        cache = SemanticCache(threshold=0.9)
+        cache.store([1.0, 0.0], "x")
+        cache.store([0.0, 1.0], "y")
+
+        self.assertEqual(cache.lookup([0.1, 1.0]), "y")
+
+    def test_empty_cache_misses(self):
+        """Test that looking up in an empty cache returns None."""
+        self.assertIsNone(SemanticCache().lookup([1.0, 0.0]))
+
+    def test_expired_entries_are_dropped(self):
+        """Test that entries older than the TTL no longer hit."""
+        cache = SemanticCache(ttl_seconds=10)
+        with mock.patch.object(semantic_cache.time, "monotonic", return_value=100.0):
+            cache.store([1.0, 0.0], "old")
+        with mock.patch.object(semantic_cache.time, "monotonic", return_value=105.0):
+            cache.store([0.0, 1.0], "new")
+        with mock.patch.object(semantic_cache.time, "monotonic", return_value=111.0):
+            self.assertIsNone(cache.lookup([1.0, 0.0]))
+            self.assertEqual(cache.lookup([0.0, 1.0]), "new")
+
+    def test_max_entries_evicts_oldest(self):
+        """Test that storing past max_entries evicts the oldest entry."""
+        cache = SemanticCache(max_entries=2)
+        cache.store([1.0, 0.0, 0.0], "a")
+        cache.store([0.0, 1.0, 0.0], "b")
+        cache.store([0.0, 0.0, 1.0], "c")
+
+        self.assertIsNone(cache.lookup([1.0, 0.0, 0.0]))
+        self.assertEqual(cache.lookup([0.0, 1.0, 0.0]), "b")
+        self.assertEqual(cache.lookup([0.0, 0.0, 1.0]), "c")
+
+    def test_clear(self):
+        """Test that clear() forgets every entry."""
+        cache = SemanticCache()
+        cache.store([1.0, 0.0], "answer")
+        cache.clear()
+
+        self.assertIsNone(cache.lookup([1.0, 0.0]))
+
+    def test_namespace_resets_on_new_index_version(self):
+        """Test that a changed index version starts a fresh cache for the namespace."""
+        namespace = ("test-project", "code", 5, None)
+        cache = get_semantic_cache(namespace, version=1)
+        cache.store(np.array([1.0, 0.0]), "answer")
+
+        self.assertIs(get_semantic_cache(namespace, version=1), cache)
+        self.assertIsNone(get_semantic_cache(namespace, version=2).lookup([1.0, 0.0]))
+
+    def test_clear_semantic_caches(self):
+        """Test that clear_semantic_caches() empties every namespace."""
+        cache = get_semantic_cache(("test-project", "code", 3, None))
+        cache.store([1.0, 0.0], "answer")
+        clear_semantic_caches()
+
+        self.assertIsNone(cache.lookup([1.0, 0.0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import threading
+from unittest import mock
+
+import numpy as np
+
+from coding_agent.tools import vector_search_tool
+from coding_agent.tools.vector_search_tool import _CollectionMirror, _EmbedBatcher
+
+
+class FakeCollection:
+    """Stands in for a Chroma collection, returning fixed rows from get()."""
+
+    def __init__(self, documents, metadatas, embeddings):
+        self.data = {'documents': documents, 'metadatas': metadatas, 'embeddings': embeddings}
+
+    def get(self, include=None):
+        return self.data
+
+
+class TestCollectionMirror(unittest.TestCase):
+    """Unit tests for the in-memory brute-force search mirror."""
+
+    def setUp(self):
+        """Build a mirror over four small, deliberately unnormalized vectors."""
+        collection = FakeCollection(
+            documents=['a', 'b', 'c', 'd'],
+            metadatas=[{'file_type': 'py'}, {'file_type': 'js'}, {'file_type': 'py'}, {'file_type': 'py'}],
+            embeddings=np.array([[2.0, 0.0], [0.9, 0.1], [0.0, 3.0], [0.7, 0.7]])
+        )
+        self.mirror = _CollectionMirror(collection, version=())
+
+    def test_top_k_in_similarity_order(self):
+        """Test that the closest rows come back first with cosine distances."""
+        result = self.mirror.query([1.0, 0.0], n_results=3)
+
+        self.assertEqual(result['documents'], [['a', 'b', 'd']])
+        distances = result['distances'][0]
+        self.assertAlmostEqual(distances[0], 0.0, places=5)
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[2], 1 - np.sqrt(0.5), places=5)
+
+    def test_n_results_larger_than_collection(self):
+        """Test that asking for more rows than exist returns every row."""
+        result = self.mirror.query([0.0, 1.0], n_results=10)
+
+        self.assertEqual(len(result['documents'][0]), 4)
+        self.assertEqual(result['documents'][0][0], 'c')
+
+    def test_file_type_filter(self):
+        """Test that the filter mask only returns matching rows."""
+        result = self.mirror.query([1.0, 0.0], n_results=5, file_type_filter='py')
+
+        self.assertEqual(result['documents'], [['a', 'd', 'c']])
+        self.assertTrue(all(metadata['file_type'] == 'py' for metadata in result['metadatas'][0]))
+
+    def test_filter_without_matches(self):
+        """Test that a filter matching nothing returns empty results."""
+        result = self.mirror.query([1.0, 0.0], n_results=3, file_type_filter='rs')
+
+        self.assertEqual(result, {'documents': [[]], 'metadatas': [[]], 'distances': [[]]})
+
+    def test_empty_collection(self):
+        """Test that an index with no elements yields empty results instead of raising."""
+        mirror = _CollectionMirror(FakeCollection([], [], []), version=())
+
+        result = mirror.query([1.0, 0.0], n_results=5)
+        self.assertEqual(result, {'documents': [[]], 'metadatas': [[]], 'distances': [[]]})
+
+
+class BlockingModel:
+    """Stands in for the sentence transformer; single-query encodes block until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def encode(self, sentences, **kwargs):
+        self.calls.append(sentences)
+        if isinstance(sentences, str):
+            self.release.wait(5)
+            return np.array([len(sentences), 0.0])
+        return np.array([[len(sentence), 1.0] for sentence in sentences])
+
+
+class TestEmbedBatcher(unittest.TestCase):
+    """Unit tests for the query encode batcher."""
+
+    def test_concurrent_encodes_share_one_forward_pass(self):
+        """Test that encodes arriving while the model is busy are batched together."""
+        model = BlockingModel()
+        batcher = _EmbedBatcher(window_seconds=5, max_batch=2)
+        results = {}
+
+        def encode(query):
+            results[query] = batcher.encode(query)
+
+        with mock.patch.object(vector_search_tool, "_get_cached_model", return_value=model):
+            # the first query finds the batcher idle and encodes directly, holding the model
+            busy = threading.Thread(target=encode, args=("busy",))
+            busy.start()
+            while not model.calls:
+                pass
+            concurrent = [threading.Thread(target=encode, args=(query,)) for query in ("ab", "abc")]
+            for thread in concurrent:
+                thread.start()
+            for thread in concurrent:
+                thread.join(5)
+            model.release.set()
+            busy.join(5)
+
+        batched = [call for call in model.calls if not isinstance(call, str)]
+        self.assertEqual(len(batched), 1)
+        self.assertEqual(sorted(batched[0]), ["ab", "abc"])
+        np.testing.assert_array_equal(results["ab"], [2, 1])
+        np.testing.assert_array_equal(results["abc"], [3, 1])
+        np.testing.assert_array_equal(results["busy"], [4, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+# entries older than this are recomputed, so a swapped or updated model can't serve stale vectors forever
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# stay well below SQLite's limit on bound parameters per statement
+_QUERY_CHUNK = 500
+
+class EmbeddingCache:
+    """Persistent cache of embeddings keyed by a hash of the embedded text"""
+
+    def __init__(self, cache_path: str, model_name: str, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds
+        # the owning IndexingAgent is reused across tool calls, which ADK may run on different threads
+        self.conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, created REAL NOT NULL, "
+            "PRIMARY KEY (model, key))"
+        )
+        self.conn.execute("DELETE FROM embeddings WHERE created < ?", (time.time() - self.ttl_seconds,))
+        self.conn.commit()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get_or_compute(self, texts: Sequence[str], compute_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return one embedding row per text, only calling compute_fn for texts not cached yet
+
+        Args:
+            texts: Texts to embed
+            compute_fn: Called with the list of uncached texts, must return one row per text
+
+        Returns:
+            float32 array of shape (len(texts), dim)
+        """
+        with self._lock:
+            return self._get_or_compute(texts, compute_fn)
+
+    def _get_or_compute(self, texts: Sequence[str], compute_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        keys = [self._key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        cutoff = time.time() - self.ttl_seconds
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), _QUERY_CHUNK):
+            chunk = unique_keys[i:i + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE model = ? AND created >= ? AND key IN ({placeholders})",
+                (self.model_name, cutoff, *chunk)
+            )
+            for key, blob in rows:
+                vectors[key] = np.frombuffer(blob, dtype=np.float32)
+
+        # identical chunks (license headers, boilerplate imports) only get embedded once
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            computed = np.asarray(compute_fn(list(missing.values())), dtype=np.float32)
+            now = time.time()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector, created) VALUES (?, ?, ?, ?)",
+                [(self.model_name, key, row.tobytes(), now) for key, row in zip(missing, computed)]
+            )
+            self.conn.commit()
+            vectors.update(zip(missing, computed))
+
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([vectors[key] for key in keys])
+
+    def close(self):
+        self.conn.close()
@@ -1,21 +1,80 @@
 import os
+import re
+import stat
+import hashlib
+from typing import Dict, Tuple
 from google.adk.tools import FunctionTool
 
 # this should point to the workspace root (parent of coding_agent folder)
 PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+# trailing separator so sibling dirs like "<root>_evil" don't pass the prefix check
+_PROJECT_ROOT_WITH_SEP = os.path.join(PROJECT_ROOT, '')
+# only absolute paths, drive letters and ".." components can leave the root; anything else skips normpath
+_SUSPICIOUS_PATH_RE = re.compile(r'^[/\\]|^[A-Za-z]:|(?:^|[/\\])\.\.(?:[/\\]|$)')
+
+# full path -> (content digest, mtime_ns, size) of what write_file last put there,
+# so rewriting identical content can skip the disk entirely
+_written_files: Dict[str, Tuple[str, int, int]] = {}
 
 def _is_path_safe(path: str) -> bool:
     """Checks if the provided path is within the project root."""
-    abs_path = os.path.abspath(os.path.join(PROJECT_ROOT, path))
-    return abs_path.startswith(PROJECT_ROOT)
+    if not _SUSPICIOUS_PATH_RE.search(path):
+        return True
+    # PROJECT_ROOT is already absolute, so normpath is enough (abspath would also call getcwd)
+    abs_path = os.path.normpath(os.path.join(PROJECT_ROOT, path))
+    return abs_path == PROJECT_ROOT or abs_path.startswith(_PROJECT_ROOT_WITH_SEP)
+
+def _utf8_boundary(raw: bytes) -> int:
+    """Length of the longest prefix of raw that doesn't end partway through a UTF-8 character."""
+    for i in range(1, min(4, len(raw)) + 1):
+        byte = raw[-i]
+        if byte & 0xC0 != 0x80:
+            width = 1 if byte < 0x80 else 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return len(raw) if width <= i else len(raw) - i
+    return len(raw)
+
+def read_file(file_path: str, offset: int = 0, max_bytes: int = 256_000) -> str:
+    """Reads the content of a file if it is within the safe project directory.
 
-def read_file(file_path: str) -> str:
-    """Reads the full content of a file if it is within the safe project directory."""
+    Files larger than max_bytes are returned one window at a time, starting at the byte
+    offset, with a note saying which offset to pass next to keep reading.
+    """
     if not _is_path_safe(file_path):
         return f"Error: Path '{file_path}' is outside the allowed project directory."
+    if offset < 0 or max_bytes <= 0:
+        return "Error: offset must be >= 0 and max_bytes must be > 0."
     try:
-        with open(os.path.join(PROJECT_ROOT, file_path), 'r') as f:
-            return f.read()
+        full_path = os.path.join(PROJECT_ROOT, file_path)
+        size = os.path.getsize(full_path)
+        # binary read + explicit decode skips TextIOWrapper's buffering and newline translation;
+        # only the requested window is pulled into memory for big files
+        with open(full_path, 'rb') as f:
+            f.seek(offset)
+            raw = f.read(max_bytes)
+            # an arbitrary offset can land inside a character; start at the next one instead
+            skip = 0
+            while skip < min(3, len(raw)) and 0x80 <= raw[skip] <= 0xBF:
+                skip += 1
+            start = offset + skip
+            raw = raw[skip:]
+            if start + len(raw) < size:
+                # end the window on a character boundary so the next offset starts on one too
+                cut = _utf8_boundary(raw)
+                if cut == 0:
+                    # window smaller than one character: finish it so paging always advances
+                    raw += f.read(3)
+                    cut = _utf8_boundary(raw)
+                raw = raw[:cut]
+        if offset == 0 and len(raw) == size:
+            return raw.decode('utf-8')
+        content = raw.decode('utf-8')
+        end = start + len(raw)
+        if end < size:
+            content += (f"\n\n[Truncated: showing bytes {start}-{end} of {size}. "
+                        f"Call read_file with offset={end} to continue.]")
+        elif start != offset:
+            content += f"\n\n[Showing bytes {start}-{end} of {size}.]"
+        return content
     except FileNotFoundError:
         return f"Error: File not found at '{file_path}'."
     except Exception as e:
@@ -28,9 +87,45 @@ def write_file(file_path: str, content: str) -> str:
     try:
         full_path = os.path.join(PROJECT_ROOT, file_path)
         os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # write through symlinks like a plain open() does: the rename below must land on the
+        # real file, not replace the link itself with a regular file
+        target = os.path.realpath(full_path)
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        
+        digest = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+        try:
+            existing = os.stat(target)
+        except FileNotFoundError:
+            existing = None
+        # only trust the cached digest if nobody touched the file since we wrote it
+        if existing and _written_files.get(target) == (digest, existing.st_mtime_ns, existing.st_size):
+            return f"Successfully wrote to {file_path} (content unchanged)."
+        
+        if existing and existing.st_nlink > 1:
+            # a rename would split the hard link, so update the shared inode in place
+            with open(target, 'w') as f:
+                f.write(content)
+        else:
+            # write next to the target and rename over it so a crash never leaves a half-written file
+            # O_EXCL guards against name clashes, and mode 0o666 lets the kernel apply the umask
+            # the way a plain open() would (mkstemp would create the file as 0600)
+            tmp_path = os.path.join(directory, f".tmp-{os.urandom(8).hex()}")
+            fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(content)
+                if existing:
+                    # keep the permissions of the file being replaced
+                    os.chmod(tmp_path, stat.S_IMODE(existing.st_mode))
+                os.replace(tmp_path, target)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
         
-        with open(full_path, 'w') as f:
-            f.write(content)
+        written = os.stat(target)
+        _written_files[target] = (digest, written.st_mtime_ns, written.st_size)
         return f"Successfully wrote to {file_path}."
     except Exception as e:
         return f"An unexpected error occurred while writing: {e}"
@@ -11,9 +11,52 @@ import chromadb
 from chromadb.config import Settings
 import json
 import tiktoken
+from .embed_cache import EmbeddingCache
+
+# file types picked up by index_codebase (str.endswith takes the tuple directly)
+_CODE_EXTS = ('.py', '.js', '.ts', '.tsx', '.jsx', '.md')
+_IGNORE_DIRS = frozenset({'.git', '__pycache__', 'node_modules', '.venv', 'venv', '.adk_index'})
+_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+# rows per Chroma upsert: amortizes the per-call transaction cost and stays under the client's max batch size
+_UPSERT_BATCH_SIZE = 250
+# HNSW graph settings, only applied when a collection is created; delete .adk_index once to rebuild an older index with them
+_HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 100,
+    "hnsw:M": 16,
+    "hnsw:num_threads": os.cpu_count() or 1,
+}
+
+# search results show this much of each element, so the truncated text is stored once at index time
+_PREVIEW_CHARS = 300
+_DOCSTRING_PREVIEW_CHARS = 100
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def _walk_code_files(root: str):
+    """Yield paths of indexable files under root, skipping ignored dirs (os.scandir, no Path per entry)"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _IGNORE_DIRS:
+                        stack.append(entry.path)
+                elif entry.name.endswith(_CODE_EXTS) and entry.is_file():
+                    yield entry.path
 
 class CodeElement:
     """Represents a single element of code (function, class, variable, etc.)"""
+    # a full index holds one of these per function/class/import, so skip the per-instance __dict__
+    __slots__ = ('name', 'element_type', 'file_path', 'start_line', 'end_line', 'content', 'docstring', 'hash')
+    
     def __init__(self, name: str, element_type: str, file_path: str, 
                  start_line: int, end_line: int, content: str, docstring: str = ""):
         self.name = name
@@ -47,20 +90,23 @@ class IndexingAgent:
     
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = SentenceTransformer(_EMBEDDING_MODEL)
         
         # Initialize ChromaDB with persistent storage
         persist_dir = str(self.project_root / ".adk_index")
         os.makedirs(persist_dir, exist_ok=True)
         self.chroma_client = chromadb.PersistentClient(path=persist_dir)
         
+        # Reindexing mostly sees unchanged chunks, so keep their embeddings around
+        self.embedding_cache = EmbeddingCache(os.path.join(persist_dir, "embed_cache.sqlite3"), _EMBEDDING_MODEL)
+        
         # Get or create collections
         try:
             self.code_collection = self.chroma_client.get_collection("code_elements")
         except:
             self.code_collection = self.chroma_client.create_collection(
                 name="code_elements",
-                metadata={"description": "Code elements from the project"}
+                metadata={"description": "Code elements from the project", **_HNSW_METADATA}
             )
         
         try:
@@ -68,7 +114,7 @@ class IndexingAgent:
         except:
             self.file_collection = self.chroma_client.create_collection(
                 name="file_summaries", 
-                metadata={"description": "File-level summaries"}
+                metadata={"description": "File-level summaries", **_HNSW_METADATA}
             )
         
         # Initialize tree-sitter parsers
@@ -105,18 +151,16 @@ class IndexingAgent:
         print("Starting codebase indexing...")
         indexed_files = []
         code_elements = []
+        file_summaries = []
         errors = []
-        code_extensions = {'.py', '.js', '.ts', '.tsx', '.jsx', '.md'}
-        code_files = []
-        for ext in code_extensions:
-            code_files.extend(self.project_root.rglob(f"*{ext}"))
-        ignore_dirs = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', '.adk_index'}
-        code_files = [f for f in code_files if not any(ignore_dir in f.parts for ignore_dir in ignore_dirs)]
+        code_files = [Path(path) for path in _walk_code_files(str(self.project_root))]
         for file_path in code_files:
             result = self._index_file(file_path)
             indexed_files.append(str(file_path.relative_to(self.project_root)))
             code_elements.extend(result['elements'])
+            file_summaries.append(result['summary'])
         self._store_elements(code_elements)
+        self._store_file_summaries(file_summaries)
         return {
             "indexed_files": indexed_files,
             "total_elements": len(code_elements),
@@ -141,9 +185,8 @@ class IndexingAgent:
             # Fallback to simple text chunking
             elements = self._simple_text_chunks(file_path, content)
         
-        # Create file summary
+        # Create file summary (stored in batches by index_codebase)
         file_summary = self._create_file_summary(file_path, content, elements)
-        self._store_file_summary(file_summary)
         
         return {"elements": elements, "summary": file_summary}
     
@@ -323,7 +366,7 @@ class IndexingAgent:
         return {
             "file_path": str(file_path.relative_to(self.project_root)),
             "file_type": file_path.suffix,
-            "line_count": len(content.split('\n')),
+            "line_count": content.count('\n') + 1,
             "element_count": len(elements),
             "elements_by_type_str": elements_by_type_str,
             "summary": f"File {file_path.name} contains {len(elements)} code elements"
@@ -345,29 +388,34 @@ class IndexingAgent:
             if element.docstring:
                 searchable_text += f"\n{element.docstring}"
             
+            metadata = element.to_dict()
+            metadata["preview"] = _truncate(element.content, _PREVIEW_CHARS)
+            if element.docstring:
+                metadata["docstring_preview"] = _truncate(str(element.docstring), _DOCSTRING_PREVIEW_CHARS)
             documents.append(searchable_text)
-            metadatas.append(element.to_dict())
+            metadatas.append(metadata)
             ids.append(f"{element.file_path}:{element.start_line}:{element.hash}")
         
-        # Generate embeddings
-        embeddings = self.embedding_model.encode(documents).tolist()
+        self._upsert_in_batches(self.code_collection, documents, metadatas, ids)
+    
+    def _store_file_summaries(self, summaries: List[Dict[str, Any]]):
+        """Store file summaries in vector database"""
+        if not summaries:
+            return
         
-        # Store in ChromaDB
-        self.code_collection.upsert(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+        documents = [summary["summary"] for summary in summaries]
+        ids = [summary["file_path"] for summary in summaries]
+        self._upsert_in_batches(self.file_collection, documents, summaries, ids)
     
-    def _store_file_summary(self, summary: Dict[str, Any]):
-        """Store file summary in vector database"""
-        document = summary["summary"]
-        embedding = self.embedding_model.encode([document])[0].tolist()
-        
-        self.file_collection.upsert(
-            documents=[document],
-            embeddings=[embedding],
-            metadatas=[summary],
-            ids=[summary["file_path"]]
-        )
+    def _upsert_in_batches(self, collection, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]):
+        """Embed and upsert rows into a collection, _UPSERT_BATCH_SIZE rows per call"""
+        # embed everything up front in one call, so torch's intra-op threads stay busy across all texts
+        embeddings = self.embedding_cache.get_or_compute(documents, self.embedding_model.encode).tolist()
+        for start in range(0, len(documents), _UPSERT_BATCH_SIZE):
+            end = start + _UPSERT_BATCH_SIZE
+            collection.upsert(
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
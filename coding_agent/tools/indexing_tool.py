@@ -1,12 +1,30 @@
 from google.adk.tools import FunctionTool
 import os
+import threading
 from pathlib import Path
+from typing import Any, Dict
+from .semantic_cache import clear_semantic_caches
+
+# project root -> IndexingAgent, so the embedding model and Chroma client load once per process
+_indexer_cache: Dict[str, Any] = {}
+_indexer_cache_lock = threading.Lock()
+
+def _get_indexer(project_root: str):
+    """Return the cached IndexingAgent for a project root, creating it on first use"""
+    from coding_agent.tools.indexing_agent import IndexingAgent
+    # held while constructing, so racing first calls don't each load their own model
+    with _indexer_cache_lock:
+        indexer = _indexer_cache.get(project_root)
+        if indexer is None:
+            indexer = _indexer_cache[project_root] = IndexingAgent(project_root)
+        return indexer
 
 def index_codebase_tool() -> str:
     project_root = Path(os.environ.get('ADK_PROJECT_ROOT', os.getcwd()))
-    from coding_agent.tools.indexing_agent import IndexingAgent
-    indexer = IndexingAgent(str(project_root))
+    indexer = _get_indexer(str(project_root))
     result = indexer.index_codebase()
+    # answers cached before the rebuild may point at code that no longer exists
+    clear_semantic_caches()
     status_msg = f"Indexing complete!\n"
     status_msg += f"Files indexed: {len(result['indexed_files'])}\n"
     status_msg += f"Code elements found: {result['total_elements']}\n"
@@ -7,6 +7,12 @@ import tempfile
 import json
 import subprocess
 import asyncio
+import atexit
+import contextlib
+import hashlib
+import re
+import threading
+from collections import OrderedDict
 
 try:
     from multilspy import SyncLanguageServer
@@ -16,6 +22,32 @@ try:
 except ImportError:
     MULTILSPY_AVAILABLE = False
 
+# every diagnostics formatter writes this line, so counts can be read back from the text in one match
+_SUMMARY_RE = re.compile(r"Summary: (\d+) errors, (\d+) warnings")
+
+# (file_path, content digest) -> formatted diagnostics; results only depend on these two,
+# so an edited file simply misses and nothing needs invalidating on write
+_DIAG_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_DIAG_CACHE_MAX = 256
+_DIAG_CACHE_LOCK = threading.Lock()
+
+def _diag_cache_key(file_path: str, content: str) -> tuple:
+    return (file_path, hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest())
+
+def _get_cached_diagnostics(key: tuple) -> Optional[str]:
+    with _DIAG_CACHE_LOCK:
+        result = _DIAG_CACHE.get(key)
+        if result is not None:
+            _DIAG_CACHE.move_to_end(key)
+        return result
+
+def _store_diagnostics(key: tuple, result: str):
+    with _DIAG_CACHE_LOCK:
+        _DIAG_CACHE[key] = result
+        _DIAG_CACHE.move_to_end(key)
+        if len(_DIAG_CACHE) > _DIAG_CACHE_MAX:
+            _DIAG_CACHE.popitem(last=False)
+
 class Position:
     """Simple position class for line/column coordinates"""
     def __init__(self, line: int, character: int):
@@ -25,6 +57,34 @@ class Position:
 class LSPTool:
     """Tool for integrating with Language Server Protocol servers"""
     
+    # Language server configurations (shared by all instances)
+    server_configs = {
+        '.py': {
+            'language_id': 'python',
+            'code_language': 'python'
+        },
+        '.java': {
+            'language_id': 'java', 
+            'code_language': 'java'
+        },
+        '.js': {
+            'language_id': 'javascript',
+            'code_language': 'javascript'
+        },
+        '.ts': {
+            'language_id': 'typescript',
+            'code_language': 'javascript'  # multilspy uses 'javascript' for both JS and TS
+        },
+        '.rs': {
+            'language_id': 'rust',
+            'code_language': 'rust'
+        },
+        '.cs': {
+            'language_id': 'csharp',
+            'code_language': 'csharp'
+        }
+    }
+    
     def __init__(self, project_root: str):
         if not MULTILSPY_AVAILABLE:
             raise ImportError("multilspy is not available. Please install it with: pip install https://github.com/microsoft/multilspy/archive/main.zip")
@@ -32,33 +92,17 @@ class LSPTool:
         self.project_root = Path(project_root).resolve()
         self.logger = self._setup_logger()
         self.language_servers: Dict[str, SyncLanguageServer] = {}
-        
-        # Language server configurations
-        self.server_configs = {
-            '.py': {
-                'language_id': 'python',
-                'code_language': 'python'
-            },
-            '.java': {
-                'language_id': 'java', 
-                'code_language': 'java'
-            },
-            '.js': {
-                'language_id': 'javascript',
-                'code_language': 'javascript'
-            },
-            '.ts': {
-                'language_id': 'typescript',
-                'code_language': 'javascript'  # multilspy uses 'javascript' for both JS and TS
-            },
-            '.rs': {
-                'language_id': 'rust',
-                'code_language': 'rust'
-            },
-            '.cs': {
-                'language_id': 'csharp',
-                'code_language': 'csharp'
-            }
+        # started servers stay running for the life of this (pooled) tool and are stopped in cleanup()
+        self._running_servers = contextlib.ExitStack()
+        self._servers_lock = threading.Lock()
+        # resolved once so each diagnostics call is a single dict lookup instead of an if/elif chain
+        js_ts = self._get_js_ts_diagnostics
+        self._diagnostic_handlers = {
+            '.py': self._get_python_diagnostics,
+            '.js': js_ts,
+            '.ts': js_ts,
+            '.tsx': js_ts,
+            '.jsx': js_ts,
         }
     
     def _setup_logger(self) -> MultilspyLogger:
@@ -67,34 +111,38 @@ class LSPTool:
     
     def _get_or_create_server(self, file_ext: str) -> Optional[SyncLanguageServer]:
         """Get or create a language server for the given file extension"""
-        if file_ext not in self.server_configs:
-            print(f"No language server configuration for {file_ext}")
-            return None
-        
-        server_name = f"server_{file_ext}"
-        
-        # Return existing server if available
-        if server_name in self.language_servers:
-            return self.language_servers[server_name]
-        
-        try:
-            # Create configuration for the language server
-            config_dict = {"code_language": self.server_configs[file_ext]['code_language']}
-            config = MultilspyConfig.from_dict(config_dict)
+        # pooled tools are shared across threads, so two first requests must not both start a server
+        with self._servers_lock:
+            # Return existing server if available
+            server = self.language_servers.get(file_ext)
+            if server is not None:
+                return server
             
-            # Create new language server with the correct three parameters
-            language_server = SyncLanguageServer.create(
-                config, 
-                self.logger, 
-                str(self.project_root)
-            )
+            server_config = self.server_configs.get(file_ext)
+            if server_config is None:
+                print(f"No language server configuration for {file_ext}")
+                return None
             
-            self.language_servers[server_name] = language_server
-            return language_server
+            try:
+                # Create configuration for the language server
+                config_dict = {"code_language": server_config['code_language']}
+                config = MultilspyConfig.from_dict(config_dict)
             
-        except Exception as e:
-            print(f"Failed to create language server for {file_ext}: {e}")
-            return None
+                # Create new language server with the correct three parameters
+                language_server = SyncLanguageServer.create(
+                    config, 
+                    self.logger, 
+                    str(self.project_root)
+                )
+                # start the server process once instead of once per request
+                self._running_servers.enter_context(language_server.start_server())
+            
+                self.language_servers[file_ext] = language_server
+                return language_server
+            
+            except Exception as e:
+                print(f"Failed to create language server for {file_ext}: {e}")
+                return None
     
     def get_diagnostics(self, file_path: str, content: Optional[str] = None) -> str:
         """
@@ -107,25 +155,104 @@ class LSPTool:
         Returns:
             Formatted string with diagnostic information
         """
-        abs_file_path = self.project_root / file_path
         if content is None:
-            if not abs_file_path.exists():
+            content = self._read_source(file_path)
+            if content is None:
                 return f"Error: File {file_path} does not exist"
-            with open(abs_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        file_ext = Path(file_path).suffix.lower()
-        if file_ext == '.py':
-            return self._get_python_diagnostics(file_path, content)
-        elif file_ext in ['.js', '.ts', '.tsx', '.jsx']:
-            return self._get_js_ts_diagnostics(file_path, content)
-        else:
-            return self._get_generic_diagnostics(file_path, content)
+        key = _diag_cache_key(file_path, content)
+        result = _get_cached_diagnostics(key)
+        if result is None:
+            result = self._diagnose(file_path, content)
+            _store_diagnostics(key, result)
+        return result
+    
+    def get_diagnostics_batch(self, file_paths: List[str]) -> Dict[str, str]:
+        """
+        Get diagnostics for several files at once.
+        
+        Args:
+            file_paths: Paths of the files to analyze
+            
+        Returns:
+            Dictionary mapping each file path to its formatted diagnostics
+        """
+        results: Dict[str, str] = {}
+        contents: Dict[str, str] = {}
+        for file_path in file_paths:
+            # one unreadable path (a directory, a binary or non-UTF-8 file) must not sink the whole batch
+            try:
+                content = self._read_source(file_path)
+            except (OSError, UnicodeDecodeError) as e:
+                results[file_path] = f"Error: Could not read {file_path}: {e}"
+                continue
+            if content is None:
+                results[file_path] = f"Error: File {file_path} does not exist"
+                continue
+            cached = _get_cached_diagnostics(_diag_cache_key(file_path, content))
+            if cached is not None:
+                results[file_path] = cached
+            else:
+                contents[file_path] = content
+        
+        # one pyflakes process for every uncached Python file instead of one per file
+        python_files = {path: content for path, content in contents.items() if Path(path).suffix.lower() == '.py'}
+        pyflakes_issues = self._run_pyflakes(python_files)
+        for file_path, content in contents.items():
+            results[file_path] = self._diagnose(file_path, content, pyflakes_issues.get(file_path))
+            _store_diagnostics(_diag_cache_key(file_path, content), results[file_path])
+        return {file_path: results[file_path] for file_path in file_paths}
+    
+    def _read_source(self, file_path: str) -> Optional[str]:
+        """Read a project file for diagnostics, or None if it doesn't exist"""
+        abs_file_path = self.project_root / file_path
+        if not abs_file_path.exists():
+            return None
+        # one big buffered binary read + decode instead of TextIOWrapper's incremental decoding
+        with open(abs_file_path, 'rb', buffering=1024 * 1024) as f:
+            raw = f.read()
+        content = raw.decode('utf-8')
+        # keep text-mode newline semantics so CRLF files don't show up as trailing whitespace
+        if b'\r' in raw:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
+    
+    def _diagnose(self, file_path: str, content: str, pyflakes_issues: Optional[List[str]] = None) -> str:
+        """Dispatch to the diagnostics for the file's language"""
+        if pyflakes_issues is not None:
+            # only the batch path passes pyflakes output, and only for .py files
+            return self._get_python_diagnostics(file_path, content, pyflakes_issues)
+        handler = self._diagnostic_handlers.get(os.path.splitext(file_path)[1].lower(), self._get_generic_diagnostics)
+        return handler(file_path, content)
+    
+    def _run_pyflakes(self, files: Dict[str, str]) -> Dict[str, List[str]]:
+        """Run pyflakes once over several in-memory files, returning its messages per file path"""
+        issues: Dict[str, List[str]] = {file_path: [] for file_path in files}
+        if not files:
+            return issues
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_to_path = {}
+            for i, (file_path, content) in enumerate(files.items()):
+                tmp_name = os.path.join(tmp_dir, f"{i}.py")
+                with open(tmp_name, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                tmp_to_path[tmp_name] = file_path
+            # wanted to try pyflakes, but seemed to sometimes work and sometimes not will
+            try:
+                result = subprocess.run(['python', '-m', 'pyflakes', *tmp_to_path],
+                                        capture_output=True, text=True, timeout=5 + len(files))
+            except Exception:
+                # pyflakes not available or failed
+                return issues
+            for issue in result.stdout.splitlines():
+                tmp_name = issue.split(':', 1)[0]
+                if issue.strip() and tmp_name in tmp_to_path:
+                    # Clean up the file path in the message
+                    issues[tmp_to_path[tmp_name]].append(issue.replace(tmp_name, tmp_to_path[tmp_name]))
+        return issues
     
-    def _get_python_diagnostics(self, file_path: str, content: str) -> str:
+    def _get_python_diagnostics(self, file_path: str, content: str, pyflakes_issues: Optional[List[str]] = None) -> str:
         """Get Python-specific diagnostics using AST and basic checks"""
         import ast
-        import tempfile
-        import subprocess
         
         diagnostics = []
         error_count = 0
@@ -157,29 +284,11 @@ class LSPTool:
                 warning_count += 1
                 diagnostics.append(f"⚠️  Warning (line {i}): Line too long ({len(line)} chars)")
         
-        # wanted to try pyflakes, but seemed to sometimes work and sometimes not will
-        try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as tmp_file:
-                tmp_file.write(content)
-                tmp_file.flush()
-                
-                result = subprocess.run(['python', '-m', 'pyflakes', tmp_file.name], 
-                                      capture_output=True, text=True, timeout=5)
-                
-                if result.stdout:
-                    pyflakes_issues = result.stdout.strip().split('\n')
-                    for issue in pyflakes_issues:
-                        if issue.strip():
-                            warning_count += 1
-                            # Clean up the file path in the message
-                            clean_issue = issue.replace(tmp_file.name, file_path)
-                            diagnostics.append(f"⚠️  Pyflakes: {clean_issue}")
-                
-                import os
-                os.unlink(tmp_file.name)
-        except:
-            # pyflakes not available or failed
-            pass
+        if pyflakes_issues is None:
+            pyflakes_issues = self._run_pyflakes({file_path: content})[file_path]
+        for issue in pyflakes_issues:
+            warning_count += 1
+            diagnostics.append(f"⚠️  Pyflakes: {issue}")
         
         # Format result
         result = f"🔍 Diagnostics for {file_path}:\n"
@@ -297,19 +406,18 @@ class LSPTool:
         language_server = self._get_or_create_server(Path(file_path).suffix)
         if not language_server:
             return f"No language server available for {Path(file_path).suffix} files"
-        with language_server.start_server():
-            try:
-                result = language_server.request_definition(
-                    file_path,  # relative path to file
-                    line,       # line number
-                    character   # column number
-                )
-                if result:
-                    return f"Definition found: {result}"
-                else:
-                    return f"No definition found at {file_path}:{line}:{character}"
-            except AttributeError:
-                return f"Definition lookup not supported for {Path(file_path).suffix} files"
+        try:
+            result = language_server.request_definition(
+                file_path,  # relative path to file
+                line,       # line number
+                character   # column number
+            )
+            if result:
+                return f"Definition found: {result}"
+            else:
+                return f"No definition found at {file_path}:{line}:{character}"
+        except AttributeError:
+            return f"Definition lookup not supported for {Path(file_path).suffix} files"
 
     def get_references(self, file_path: str, line: int, character: int) -> str:
         """
@@ -329,23 +437,22 @@ class LSPTool:
         language_server = self._get_or_create_server(Path(file_path).suffix)
         if not language_server:
             return f"No language server available for {Path(file_path).suffix} files"
-        with language_server.start_server():
-            try:
-                result = language_server.request_references(
-                    file_path,  # relative path to file
-                    line,       # line number  
-                    character   # column number
-                )
-                if result:
-                    return f"References found: {result}"
-                else:
-                    return f"No references found at {file_path}:{line}:{character}"
-            except AttributeError:
-                return f"References lookup not supported for {Path(file_path).suffix} files"
+        try:
+            result = language_server.request_references(
+                file_path,  # relative path to file
+                line,       # line number  
+                character   # column number
+            )
+            if result:
+                return f"References found: {result}"
+            else:
+                return f"No references found at {file_path}:{line}:{character}"
+        except AttributeError:
+            return f"References lookup not supported for {Path(file_path).suffix} files"
     
     def validate_code_in_shadow_workspace(self, file_path: str, new_content: str) -> Dict[str, Any]:
         """
-        Validate code changes in a temporary shadow workspace.
+        Validate code changes before they are written to the workspace.
         
         Args:
             file_path: Path to the file being modified
@@ -354,122 +461,98 @@ class LSPTool:
         Returns:
             Dictionary with validation results
         """
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_workspace = Path(temp_dir)
-            self._copy_workspace_context(temp_workspace, file_path)
-            temp_file = temp_workspace / file_path
-            temp_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            shadow_lsp = LSPTool(str(temp_workspace))
-            diagnostics_result = shadow_lsp.get_diagnostics(file_path, new_content)
-            has_errors = "ERROR" in diagnostics_result
-            error_count = diagnostics_result.count("ERROR")
-            warning_count = diagnostics_result.count("WARNING")
-            return {
-                "valid": not has_errors,
-                "error_count": error_count,
-                "warning_count": warning_count,
-                "diagnostics": diagnostics_result,
-                "temp_workspace": str(temp_workspace)
-            }
-    
-    def _copy_workspace_context(self, temp_workspace: Path, target_file: str):
-        """Copy relevant workspace files for context"""
-        try:
-            import shutil
-            
-            # For now, just copy the target file and basic project structure
-            # In a full implementation, you'd analyze dependencies and copy related files
-            
-            # Copy the target file if it exists
-            source_file = self.project_root / target_file
-            if source_file.exists():
-                dest_file = temp_workspace / target_file
-                dest_file.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(source_file, dest_file)
-            
-            # Copy common config files
-            config_files = [
-                'pyproject.toml', 'setup.py', 'requirements.txt',
-                'package.json', 'tsconfig.json', '.pylintrc'
-            ]
-            
-            for config_file in config_files:
-                source_config = self.project_root / config_file
-                if source_config.exists():
-                    dest_config = temp_workspace / config_file
-                    shutil.copy2(source_config, dest_config)
-                    
-        except Exception as e:
-            print(f"Could not copy full workspace context: {e}")
+        # Diagnostics only look at the text (AST, line checks, pyflakes on a temp copy), so the
+        # proposed content is checked in memory; staging it in a shadow workspace bought nothing
+        diagnostics_result = self.get_diagnostics(file_path, new_content)
+        summary = _SUMMARY_RE.search(diagnostics_result)
+        error_count, warning_count = (int(summary.group(1)), int(summary.group(2))) if summary else (0, 0)
+        return {
+            "valid": error_count == 0,
+            "error_count": error_count,
+            "warning_count": warning_count,
+            "diagnostics": diagnostics_result
+        }
     
     def cleanup(self):
         """Cleanup language server resources"""
-        for server in self.language_servers.values():
-            try:
-                # For multilspy, we don't need explicit shutdown
-                # The context manager handles this
-                pass
-            except Exception as e:
-                print(f"Error shutting down language server: {e}")
+        try:
+            # exits each server's start_server() context, which shuts the process down
+            self._running_servers.close()
+        except Exception as e:
+            print(f"Error shutting down language server: {e}")
+        self._running_servers = contextlib.ExitStack()
         self.language_servers.clear()
 
+# resolved project root -> LSPTool, so language servers started by one tool call keep serving the next
+_LSP_TOOL_POOL: Dict[str, LSPTool] = {}
+_LSP_TOOL_POOL_LOCK = threading.Lock()
+
+def _get_lsp_tool(project_root: str) -> LSPTool:
+    """Return the pooled LSPTool for a project root, creating it on first use"""
+    key = str(Path(project_root).resolve())
+    with _LSP_TOOL_POOL_LOCK:
+        lsp_tool = _LSP_TOOL_POOL.get(key)
+        if lsp_tool is None:
+            lsp_tool = _LSP_TOOL_POOL[key] = LSPTool(key)
+        return lsp_tool
+
+@atexit.register
+def _cleanup_lsp_tool_pool():
+    with _LSP_TOOL_POOL_LOCK:
+        for lsp_tool in _LSP_TOOL_POOL.values():
+            lsp_tool.cleanup()
+        _LSP_TOOL_POOL.clear()
+
 # ADK tool functions
-def get_diagnostics_tool(file_path: str, content: str = "") -> str:
+# Diagnostics parse the whole file and shell out to pyflakes, so the tools that run them are async
+# and do the work in a thread; ADK awaits coroutine tools instead of blocking its event loop on them.
+async def get_diagnostics_tool(file_path: str, content: str = "") -> str:
     """Get diagnostics (errors, warnings) for a file"""
-    import os
     project_root = os.environ.get('ADK_PROJECT_ROOT', os.getcwd())
     
-    lsp_tool = LSPTool(project_root)
-    try:
-        content_arg = content if content else None
-        return lsp_tool.get_diagnostics(file_path, content_arg)
-    finally:
-        lsp_tool.cleanup()
+    lsp_tool = _get_lsp_tool(project_root)
+    content_arg = content if content else None
+    return await asyncio.to_thread(lsp_tool.get_diagnostics, file_path, content_arg)
+
+async def batch_diagnostics_tool(file_paths: List[str]) -> str:
+    """Get diagnostics (errors, warnings) for several files in one call"""
+    project_root = os.environ.get('ADK_PROJECT_ROOT', os.getcwd())
+    
+    lsp_tool = _get_lsp_tool(project_root)
+    results = await asyncio.to_thread(lsp_tool.get_diagnostics_batch, file_paths)
+    return "\n\n".join(results.values())
 
 def go_to_definition_tool(file_path: str, line: int, character: int) -> str:
     """Get definition location for symbol at given position"""
-    import os
     project_root = os.environ.get('ADK_PROJECT_ROOT', os.getcwd())
     
-    lsp_tool = LSPTool(project_root)
-    try:
-        return lsp_tool.get_definition(file_path, line, character)
-    finally:
-        lsp_tool.cleanup()
+    lsp_tool = _get_lsp_tool(project_root)
+    return lsp_tool.get_definition(file_path, line, character)
 
 def find_references_tool(file_path: str, line: int, character: int) -> str:
     """Find all references to symbol at given position"""
-    import os
     project_root = os.environ.get('ADK_PROJECT_ROOT', os.getcwd())
     
-    lsp_tool = LSPTool(project_root)
-    try:
-        return lsp_tool.get_references(file_path, line, character)
-    finally:
-        lsp_tool.cleanup()
+    lsp_tool = _get_lsp_tool(project_root)
+    return lsp_tool.get_references(file_path, line, character)
 
-def validate_code_tool(file_path: str, new_content: str) -> str:
-    """Validate code changes in a shadow workspace"""
-    import os
+async def validate_code_tool(file_path: str, new_content: str) -> str:
+    """Validate proposed code changes for a file before writing them"""
     project_root = os.environ.get('ADK_PROJECT_ROOT', os.getcwd())
     
-    lsp_tool = LSPTool(project_root)
-    try:
-        result = lsp_tool.validate_code_in_shadow_workspace(file_path, new_content)
-        
-        if result.get("valid", False):
-            return f"✅ Code validation passed! No errors found.\nWarnings: {result.get('warning_count', 0)}"
-        else:
-            error_info = result.get("error", "")
-            diagnostics = result.get("diagnostics", "")
-            return f"❌ Code validation failed!\nErrors: {result.get('error_count', 0)}\nWarnings: {result.get('warning_count', 0)}\n\n{diagnostics}\n{error_info}"
-    finally:
-        lsp_tool.cleanup()
+    lsp_tool = _get_lsp_tool(project_root)
+    result = await asyncio.to_thread(lsp_tool.validate_code_in_shadow_workspace, file_path, new_content)
+    
+    if result.get("valid", False):
+        return f"✅ Code validation passed! No errors found.\nWarnings: {result.get('warning_count', 0)}"
+    else:
+        error_info = result.get("error", "")
+        diagnostics = result.get("diagnostics", "")
+        return f"❌ Code validation failed!\nErrors: {result.get('error_count', 0)}\nWarnings: {result.get('warning_count', 0)}\n\n{diagnostics}\n{error_info}"
 
 # ADK tool wrappers
 get_diagnostics_adk_tool = FunctionTool(get_diagnostics_tool)
+batch_diagnostics_adk_tool = FunctionTool(batch_diagnostics_tool)
 go_to_definition_adk_tool = FunctionTool(go_to_definition_tool)
 find_references_adk_tool = FunctionTool(find_references_tool)
 validate_code_adk_tool = FunctionTool(validate_code_tool) 
\ No newline at end of file
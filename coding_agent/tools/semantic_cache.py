@@ -0,0 +1,90 @@
+import bisect
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+def _normalize(embedding) -> np.ndarray:
+    vector = np.ascontiguousarray(embedding, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+def _cosine_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Cosine similarity of query against every row of matrix"""
+    if SIMSIMD_AVAILABLE:
+        # SIMD kernels (AVX2/AVX-512/NEON), and cdist releases the GIL
+        distances = np.asarray(simsimd.cdist(query[np.newaxis, :], matrix, metric="cosine"), dtype=np.float32)
+        return 1.0 - distances[0]
+    return matrix @ query
+
+class SemanticCache:
+    """In-process cache of search responses, matched by cosine similarity of the query embedding"""
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 256):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._vectors: Optional[np.ndarray] = None  # (N, D) float32, unit-length row per cached query
+        self._responses: List[str] = []
+        self._created: List[float] = []  # monotonic insert times, ascending
+        self._lock = threading.Lock()
+
+    def _drop_oldest(self, count: int):
+        if count <= 0:
+            return
+        self._responses = self._responses[count:]
+        self._created = self._created[count:]
+        self._vectors = self._vectors[count:] if self._responses else None
+
+    def lookup(self, embedding) -> Optional[str]:
+        """Return the cached response for a near-duplicate query, or None"""
+        with self._lock:
+            self._drop_oldest(bisect.bisect_left(self._created, time.monotonic() - self.ttl_seconds))
+            if self._vectors is None:
+                return None
+            # rows are stored normalized, so one matrix-vector product gives every cosine score
+            scores = _cosine_scores(self._vectors, _normalize(embedding))
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                return self._responses[best]
+            return None
+
+    def store(self, embedding, response: str):
+        with self._lock:
+            row = _normalize(embedding)[np.newaxis, :]
+            self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+            self._responses.append(response)
+            self._created.append(time.monotonic())
+            self._drop_oldest(len(self._responses) - self.max_entries)
+
+    def clear(self):
+        with self._lock:
+            self._vectors = None
+            self._responses = []
+            self._created = []
+
+# one cache per (workspace, search kind, search parameters) so different projects never share answers,
+# stored with the index version its answers were computed against
+_CACHES: Dict[Hashable, Tuple[Hashable, SemanticCache]] = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_semantic_cache(namespace: Hashable, version: Hashable = None) -> SemanticCache:
+    """Return the cache for namespace, starting a fresh one when the index version changed"""
+    with _CACHES_LOCK:
+        entry = _CACHES.get(namespace)
+        if entry is None or entry[0] != version:
+            # the index was rebuilt (possibly by another process), so every cached answer may be stale
+            entry = _CACHES[namespace] = (version, SemanticCache())
+        return entry[1]
+
+def clear_semantic_caches():
+    """Forget all cached responses, e.g. after the index was rebuilt"""
+    with _CACHES_LOCK:
+        for _, cache in _CACHES.values():
+            cache.clear()
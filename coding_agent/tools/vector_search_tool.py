@@ -1,25 +1,275 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
+import asyncio
+import os
+
+# roughly one thread per physical core; must be set before torch is first imported to size its OpenMP pool
+_TORCH_THREADS = max(1, (os.cpu_count() or 2) // 2)
+os.environ.setdefault("OMP_NUM_THREADS", str(_TORCH_THREADS))
+
 from google.adk.tools import FunctionTool
 from sentence_transformers import SentenceTransformer
+import torch
 import chromadb
+import numpy as np
 from pathlib import Path
-import os
+import atexit
+import contextlib
+import functools
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from .semantic_cache import get_semantic_cache
+
+# containerized agents often see every host CPU, and oversubscribed matmul threads slow encode down;
+# also applied directly in case torch was imported before the env var was set (a user's own value is left alone)
+if os.environ["OMP_NUM_THREADS"] == str(_TORCH_THREADS):
+    torch.set_num_threads(_TORCH_THREADS)
+
+def _cpu_supports_bf16() -> bool:
+    # the public check only exists in newer torch releases
+    check = getattr(torch.cpu, "is_bf16_supported", None) or getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+    try:
+        return bool(check()) if check is not None else False
+    except Exception:
+        return False
+
+# native BF16 matmuls halve weight bandwidth; emulating them on older CPUs would be slower than FP32
+_BF16_AUTOCAST = _cpu_supports_bf16()
+
+@contextlib.contextmanager
+def _inference():
+    """No autograd bookkeeping, plus BF16 autocast where the CPU supports it (no-op for the ONNX backend)"""
+    with torch.inference_mode():
+        if _BF16_AUTOCAST:
+            with torch.autocast("cpu", dtype=torch.bfloat16):
+                yield
+        else:
+            yield
+
+# loading the model and opening the ChromaDB client each take seconds, so share them across tool calls
+_MODEL_CACHE: Dict[str, SentenceTransformer] = {}
+_MODEL_LOCK = threading.Lock()
+_CLIENT_CACHE: Dict[str, Any] = {}
+_CLIENT_LOCK = threading.Lock()
+
+def _get_cached_model(model_name: str = 'all-MiniLM-L6-v2') -> SentenceTransformer:
+    """Return the process-wide SentenceTransformer for model_name, loading it on first use"""
+    model = _MODEL_CACHE.get(model_name)
+    if model is None:
+        with _MODEL_LOCK:
+            model = _MODEL_CACHE.get(model_name)
+            if model is None:
+                model = _MODEL_CACHE[model_name] = _load_model(model_name)
+    return model
+
+def _load_model(model_name: str) -> SentenceTransformer:
+    """Load the int8-quantized ONNX export when available, otherwise the default torch model"""
+    try:
+        # VNNI int8 matmuls are several times faster than FP32 torch for single short queries
+        model = SentenceTransformer(
+            model_name,
+            backend="onnx",
+            model_kwargs={"file_name": "onnx/model_qint8_avx512_vnni.onnx"}
+        )
+    except Exception:
+        # sentence-transformers[onnx] not installed, or too old to know the backend argument
+        model = SentenceTransformer(model_name)
+    # pay the one-off graph optimization cost now rather than on the first user query
+    with _inference():
+        model.encode("warmup")
+    return model
+
+def _get_cached_client(persist_dir: str):
+    """Return the process-wide ChromaDB client for persist_dir"""
+    client = _CLIENT_CACHE.get(persist_dir)
+    if client is None:
+        with _CLIENT_LOCK:
+            client = _CLIENT_CACHE.get(persist_dir)
+            if client is None:
+                client = _CLIENT_CACHE[persist_dir] = chromadb.PersistentClient(path=persist_dir)
+    return client
+
+class _EmbedBatcher:
+    """Coalesce concurrent query encodes into a single model forward pass"""
+
+    def __init__(self, window_seconds: float = 0.005, max_batch: int = 32):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._worker: Optional[threading.Thread] = None
+
+    def encode(self, query: str):
+        with self._lock:
+            self._in_flight += 1
+            # nobody else is encoding, so batching would only add latency
+            direct = self._in_flight == 1
+            if not direct and self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._worker.start()
+        try:
+            if direct:
+                with _inference():
+                    return _get_cached_model().encode(query)
+            future: Future = Future()
+            self._queue.put((query, future))
+            return future.result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with _inference():
+                    vectors = _get_cached_model().encode(
+                        [query for query, _ in batch], batch_size=self.max_batch, convert_to_numpy=True
+                    )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+_EMBED_BATCHER = _EmbedBatcher()
+
+@functools.lru_cache(maxsize=1000)
+def _embed(query: str) -> np.ndarray:
+    """Embed a search query, remembering recent queries since agents often repeat them"""
+    # handed to Chroma as an ndarray, skipping a round trip through a list of Python floats
+    embedding = np.asarray(_EMBED_BATCHER.encode(query), dtype=np.float32)
+    # the cached array is shared by every caller, so make sure nobody mutates it
+    embedding.setflags(write=False)
+    return embedding
+
+# below this many code elements one BLAS matrix-vector product beats a Chroma query
+_SMALL_INDEX_MAX_ROWS = 10_000
+
+class _CollectionMirror:
+    """Contiguous in-memory copy of a small collection, searched by brute force"""
+
+    def __init__(self, collection, version: Tuple):
+        self.version = version
+        data = collection.get(include=['embeddings', 'documents', 'metadatas'])
+        self.documents = list(data.get('documents') or [])
+        self.metadatas = list(data.get('metadatas') or [])
+        if not self.documents:
+            # an index with no elements yet (nothing parsed, or indexing failed); reshape(0, -1) would raise
+            embeddings = np.empty((0, 0), dtype=np.float32)
+        else:
+            embeddings = np.asarray(data.get('embeddings'), dtype=np.float32).reshape(len(self.documents), -1)
+        # normalized once here so each search is a single matrix-vector product
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.embeddings = np.ascontiguousarray(embeddings / np.maximum(norms, 1e-12))
+        self.file_types = np.array(
+            [metadata.get('file_type') if isinstance(metadata, dict) else None for metadata in self.metadatas],
+            dtype=object
+        )
+
+    def query(self, query_embedding, n_results: int, file_type_filter: Optional[str] = None) -> Dict[str, List[List[Any]]]:
+        """Same result shape as collection.query, with cosine distances"""
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_vector = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+        if file_type_filter:
+            candidates = np.flatnonzero(self.file_types == file_type_filter)
+        else:
+            candidates = np.arange(len(self.documents))
+        k = min(n_results, len(candidates))
+        if k <= 0:
+            return {'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        scores = self.embeddings[candidates] @ query_vector
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = candidates[top]
+        return {
+            'documents': [[self.documents[i] for i in rows]],
+            'metadatas': [[self.metadatas[i] for i in rows]],
+            'distances': [(1.0 - scores[top]).tolist()],
+        }
+
+_MIRRORS: Dict[str, _CollectionMirror] = {}
+_MIRRORS_LOCK = threading.Lock()
+
+def _index_version(persist_dir: str) -> Tuple:
+    """Changes whenever Chroma commits to the index, so a stale mirror is never served"""
+    version = []
+    for name in ("chroma.sqlite3", "chroma.sqlite3-wal"):
+        try:
+            st = os.stat(os.path.join(persist_dir, name))
+            version.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+def _get_small_collection_mirror(persist_dir: str, collection) -> Optional[_CollectionMirror]:
+    """Return an up-to-date in-memory mirror of collection, or None if it is too large to brute-force"""
+    version = _index_version(persist_dir)
+    with _MIRRORS_LOCK:
+        mirror = _MIRRORS.get(persist_dir)
+        if mirror is not None and mirror.version == version:
+            return mirror
+        if collection.count() > _SMALL_INDEX_MAX_ROWS:
+            _MIRRORS.pop(persist_dir, None)
+            return None
+        mirror = _MIRRORS[persist_dir] = _CollectionMirror(collection, version)
+        return mirror
+
+def _prefetch_index_files(persist_dir: str):
+    """Pull the Chroma files into the page cache so the first query doesn't fault them in page by page"""
+    for dirpath, _, filenames in os.walk(persist_dir):
+        for name in filenames:
+            # the embedding cache is only read while indexing
+            if not name.endswith(('.bin', '.sqlite3')) or name == "embed_cache.sqlite3":
+                continue
+            try:
+                with open(os.path.join(dirpath, name), 'rb', buffering=0) as f:
+                    if hasattr(os, 'posix_fadvise'):
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                    else:
+                        while f.read(1 << 20):
+                            pass
+            except OSError:
+                continue
+
+# formatted get_file_structure responses, keyed by (index dir, file path, index version)
+_FILE_STRUCTURE_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_FILE_STRUCTURE_CACHE_MAX = 128
+_FILE_STRUCTURE_LOCK = threading.Lock()
 
 class VectorSearchTool:
     """Tool for semantic search over the indexed codebase"""
     
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = _get_cached_model('all-MiniLM-L6-v2')
         
         # Initialize ChromaDB client with persistent storage
         persist_dir = str(self.project_root / ".adk_index")
         if not os.path.exists(persist_dir):
             print(f"Warning: Index directory {persist_dir} does not exist. Run indexing first.")
         
-        self.client = chromadb.PersistentClient(path=persist_dir)
-        
-        # Get existing collections
+        self.persist_dir = persist_dir
+        self.client = _get_cached_client(persist_dir)
+        self._load_collections()
+        if os.path.isdir(persist_dir):
+            threading.Thread(target=_prefetch_index_files, args=(persist_dir,), name="index-prefetch", daemon=True).start()
+    
+    def _load_collections(self):
+        """Get existing collections, leaving them None until the project has been indexed"""
         try:
             self.code_collection = self.client.get_collection("code_elements")
             self.file_collection = self.client.get_collection("file_summaries")
@@ -32,16 +282,28 @@ class VectorSearchTool:
         if not self.code_collection:
             return "No code index found. Please run indexing first."
         # Create query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
-        where_filter = None
-        if file_type_filter:
-            from typing import Any, cast
-            where_filter = cast(Any, {"file_type": file_type_filter})
-        results = self.code_collection.query(
-            query_embeddings=[query_embedding],
-            n_results=max_results,
-            where=where_filter
+        query_embedding = _embed(query)
+        # agents often re-ask near-identical questions, so answer those from the cache
+        cache = get_semantic_cache(
+            (str(self.project_root), "code", max_results, file_type_filter),
+            _index_version(self.persist_dir)
         )
+        cached = cache.lookup(query_embedding)
+        if cached is not None:
+            return cached
+        mirror = _get_small_collection_mirror(self.persist_dir, self.code_collection)
+        if mirror is not None:
+            results = mirror.query(query_embedding, max_results, file_type_filter)
+        else:
+            where_filter = None
+            if file_type_filter:
+                from typing import Any, cast
+                where_filter = cast(Any, {"file_type": file_type_filter})
+            results = self.code_collection.query(
+                query_embeddings=[query_embedding],
+                n_results=max_results,
+                where=where_filter
+            )
         documents = results.get('documents')
         metadatas = results.get('metadatas') 
         distances = results.get('distances')
@@ -50,31 +312,39 @@ class VectorSearchTool:
         doc_list = documents[0]
         meta_list = metadatas[0] 
         dist_list = distances[0]
-        if not (doc_list and meta_list and dist_list):
-            return f"No results found for query: '{query}'"
         if not (len(doc_list) == len(meta_list) == len(dist_list)):
             return f"Inconsistent result data for query: '{query}'"
         formatted_results = []
-        for i, (doc, metadata, distance) in enumerate(zip(doc_list, meta_list, dist_list)):
+        for i, (metadata, distance) in enumerate(zip(meta_list, dist_list)):
             if not isinstance(metadata, dict):
                 continue
-            result_text = f"Result {i+1} (similarity: {1-distance:.3f}):\n"
-            result_text += f"  Name: {metadata.get('name', 'unknown')}\n"
-            result_text += f"  Type: {metadata.get('element_type', 'unknown')}\n"
-            result_text += f"  File: {metadata.get('file_path', 'unknown')}\n"
-            result_text += f"  Lines: {metadata.get('start_line', 'unknown')}-{metadata.get('end_line', 'unknown')}\n"
-            if metadata.get('docstring'):
-                docstring = str(metadata['docstring'])
-                if len(docstring) > 100:
-                    docstring = docstring[:100] + "..."
-                result_text += f"  Docstring: {docstring}\n"
-            content = metadata.get('content', '')
-            if isinstance(content, str) and len(content) > 300:
-                content = content[:300] + "..."
-            result_text += f"  Content:\n{content}\n"
-            result_text += "-" * 50 + "\n"
-            formatted_results.append(result_text)
-        return "\n".join(formatted_results)
+            get = metadata.get
+            docstring_line = ""
+            if get('docstring'):
+                # previews are truncated at index time; indexes built before that still need slicing here
+                docstring = get('docstring_preview')
+                if docstring is None:
+                    docstring = str(metadata['docstring'])
+                    docstring = docstring if len(docstring) <= 100 else docstring[:100] + '...'
+                docstring_line = f"  Docstring: {docstring}\n"
+            content = get('preview')
+            if content is None:
+                content = get('content', '')
+                if isinstance(content, str) and len(content) > 300:
+                    content = content[:300] + "..."
+            formatted_results.append(
+                f"Result {i+1} (similarity: {1-distance:.3f}):\n"
+                f"  Name: {get('name', 'unknown')}\n"
+                f"  Type: {get('element_type', 'unknown')}\n"
+                f"  File: {get('file_path', 'unknown')}\n"
+                f"  Lines: {get('start_line', 'unknown')}-{get('end_line', 'unknown')}\n"
+                f"{docstring_line}"
+                f"  Content:\n{content}\n"
+                f"{'-' * 50}\n"
+            )
+        response = "\n".join(formatted_results)
+        cache.store(query_embedding, response)
+        return response
     
     def find_files_by_content(self, query: str, max_results: int = 5) -> str:
         """
@@ -92,7 +362,7 @@ class VectorSearchTool:
         
         try:
             # Create query embedding
-            query_embedding = self.embedding_model.encode(query).tolist()
+            query_embedding = _embed(query)
             
             # Search in file summaries
             results = self.file_collection.query(
@@ -113,31 +383,28 @@ class VectorSearchTool:
             meta_list = metadatas[0]
             dist_list = distances[0]
             
-            # Ensure all lists are valid and same length
-            if not (doc_list and meta_list and dist_list):
-                return f"No files found for query: '{query}'"
-                
+            # Ensure all lists are the same length (emptiness was checked above)
             if not (len(doc_list) == len(meta_list) == len(dist_list)):
                 return f"Inconsistent file data for query: '{query}'"
             
             formatted_results = []
-            for i, (doc, metadata, distance) in enumerate(zip(doc_list, meta_list, dist_list)):
+            for i, (metadata, distance) in enumerate(zip(meta_list, dist_list)):
                 # Ensure metadata is a dictionary
                 if not isinstance(metadata, dict):
                     continue
-                    
-                result_text = f"File {i+1} (similarity: {1-distance:.3f}):\n"
-                result_text += f"  Path: {metadata.get('file_path', 'unknown')}\n"
-                result_text += f"  Type: {metadata.get('file_type', 'unknown')}\n"
-                result_text += f"  Lines: {metadata.get('line_count', 'unknown')}\n"
-                result_text += f"  Elements: {metadata.get('element_count', 'unknown')}\n"
-                result_text += f"  Summary: {metadata.get('summary', 'No summary available')}\n"
-                
-                if metadata.get('elements_by_type_str'):
-                    result_text += f"  Contains: {metadata['elements_by_type_str']}\n"
                 
-                result_text += "-" * 40 + "\n"
-                formatted_results.append(result_text)
+                get = metadata.get
+                contains_line = f"  Contains: {metadata['elements_by_type_str']}\n" if get('elements_by_type_str') else ""
+                formatted_results.append(
+                    f"File {i+1} (similarity: {1-distance:.3f}):\n"
+                    f"  Path: {get('file_path', 'unknown')}\n"
+                    f"  Type: {get('file_type', 'unknown')}\n"
+                    f"  Lines: {get('line_count', 'unknown')}\n"
+                    f"  Elements: {get('element_count', 'unknown')}\n"
+                    f"  Summary: {get('summary', 'No summary available')}\n"
+                    f"{contains_line}"
+                    f"{'-' * 40}\n"
+                )
             
             return "\n".join(formatted_results)
             
@@ -211,10 +478,19 @@ class VectorSearchTool:
         if not self.code_collection:
             return "No code index found. Please run indexing first."
         
+        # agents ask for the same file's context repeatedly; the index version invalidates on reindex
+        cache_key = (self.persist_dir, file_path, _index_version(self.persist_dir))
+        with _FILE_STRUCTURE_LOCK:
+            cached = _FILE_STRUCTURE_CACHE.get(cache_key)
+            if cached is not None:
+                _FILE_STRUCTURE_CACHE.move_to_end(cache_key)
+                return cached
+        
         try:
-            # Search for elements in the specific file
+            # Search for elements in the specific file; only the metadata is used, so skip documents and embeddings
             results = self.code_collection.get(
-                where={"file_path": file_path}
+                where={"file_path": file_path},
+                include=["metadatas"]
             )
             
             # Safely check results
@@ -227,7 +503,7 @@ class VectorSearchTool:
             # Try to get file-level information
             if self.file_collection:
                 try:
-                    file_results = self.file_collection.get(ids=[file_path])
+                    file_results = self.file_collection.get(ids=[file_path], include=["metadatas"])
                     file_metadatas = file_results.get('metadatas')
                     if file_metadatas and isinstance(file_metadatas, list) and len(file_metadatas) > 0:
                         metadata = file_metadatas[0]
@@ -246,9 +522,7 @@ class VectorSearchTool:
                     continue
                 element_type = metadata.get('element_type', 'unknown')
                 if isinstance(element_type, str):
-                    if element_type not in elements_by_type:
-                        elements_by_type[element_type] = []
-                    elements_by_type[element_type].append(metadata)
+                    elements_by_type.setdefault(element_type, []).append(metadata)
             
             formatted_results = [file_info]
             
@@ -261,19 +535,55 @@ class VectorSearchTool:
                     formatted_results.append(f"  - {name} (lines {start_line}-{end_line})")
                 formatted_results.append("")
             
-            return "\n".join(formatted_results)
+            response = "\n".join(formatted_results)
+            with _FILE_STRUCTURE_LOCK:
+                _FILE_STRUCTURE_CACHE[cache_key] = response
+                if len(_FILE_STRUCTURE_CACHE) > _FILE_STRUCTURE_CACHE_MAX:
+                    _FILE_STRUCTURE_CACHE.popitem(last=False)
+            return response
             
         except Exception as e:
             return f"Error getting file structure: {str(e)}"
 
+# one tool per project root, so tool calls reuse the client and collection handles
+_TOOL_CACHE: Dict[str, VectorSearchTool] = {}
+_TOOL_LOCK = threading.Lock()
+
+def _get_tool(project_root: str) -> VectorSearchTool:
+    key = str(Path(project_root).resolve())
+    with _TOOL_LOCK:
+        tool = _TOOL_CACHE.get(key)
+        if tool is None:
+            tool = _TOOL_CACHE[key] = VectorSearchTool(key)
+        elif tool.code_collection is None or tool.file_collection is None:
+            # the project may have been indexed since this tool was created
+            tool._load_collections()
+        return tool
+
+@atexit.register
+def _close_tools():
+    """Release the ChromaDB SQLite handles on interpreter exit"""
+    with _TOOL_LOCK:
+        _TOOL_CACHE.clear()
+    with _CLIENT_LOCK:
+        clients = list(_CLIENT_CACHE.values())
+        _CLIENT_CACHE.clear()
+    for client in clients:
+        clear_system_cache = getattr(client, "clear_system_cache", None)
+        if clear_system_cache is not None:
+            try:
+                clear_system_cache()
+            except Exception:
+                pass
+
 # Create the ADK tools
-def search_code_tool(query: str, max_results: int = 10, element_types: str = "") -> str:
+async def search_code_tool(query: str, max_results: int = 10, element_types: str = "") -> str:
     """Search for code elements using semantic similarity"""
     # Get project root from environment or use default
     import os
     project_root = os.environ.get('ADK_PROJECT_ROOT', os.getcwd())
     
-    search_tool = VectorSearchTool(project_root)
+    search_tool = _get_tool(project_root)
     
     # Parse element_types if provided
     types_list = None
@@ -282,23 +592,24 @@ def search_code_tool(query: str, max_results: int = 10, element_types: str = "")
     
     # Since semantic_search expects file_type_filter, not element types, use first type if available
     file_filter = types_list[0] if types_list else None
-    return search_tool.semantic_search(query, max_results, file_filter)
+    # off the event loop so concurrent searches overlap and their query encodes can share a batch
+    return await asyncio.to_thread(search_tool.semantic_search, query, max_results, file_filter)
 
-def search_files_tool(query: str, max_results: int = 5) -> str:
+async def search_files_tool(query: str, max_results: int = 5) -> str:
     """Search for files based on their summaries"""
     import os
     project_root = os.environ.get('ADK_PROJECT_ROOT', os.getcwd())
     
-    search_tool = VectorSearchTool(project_root)
-    return search_tool.find_files_by_content(query, max_results)
+    search_tool = _get_tool(project_root)
+    return await asyncio.to_thread(search_tool.find_files_by_content, query, max_results)
 
-def get_file_context_tool(file_path: str, max_elements: int = 20) -> str:
+async def get_file_context_tool(file_path: str, max_elements: int = 20) -> str:
     """Get context about a specific file including all its code elements"""
     import os
     project_root = os.environ.get('ADK_PROJECT_ROOT', os.getcwd())
     
-    search_tool = VectorSearchTool(project_root)
-    return search_tool.get_file_structure(file_path)
+    search_tool = _get_tool(project_root)
+    return await asyncio.to_thread(search_tool.get_file_structure, file_path)
 
 # ADK tool wrappers
 search_code_adk_tool = FunctionTool(search_code_tool)